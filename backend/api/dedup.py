@@ -0,0 +1,55 @@
+import hashlib
+import re
+from typing import List
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so re-wrapped but otherwise identical text hashes the same."""
+    return ' '.join(text.split())
+
+
+def content_hash(text: str) -> str:
+    """
+    Exact-duplicate fingerprint of a chunk. Case is preserved: chunks sharing
+    a hash share one stored text, so any difference a reader could see must
+    produce a different hash.
+    """
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def _shingles(text: str) -> List[str]:
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        # No word tokens (e.g. a row of punctuation): fall back to character shingles
+        # so such chunks don't all collapse onto the same fingerprint
+        normalized = normalize_text(text).lower()
+        if len(normalized) <= SHINGLE_SIZE:
+            return [normalized]
+        return [normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)]
+    if len(words) < SHINGLE_SIZE:
+        return words
+    return [' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash over word shingles; near-identical texts differ in few bits."""
+    weights = [0] * SIMHASH_BITS
+    for shingle in _shingles(text):
+        value = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin((a ^ b) & ((1 << SIMHASH_BITS) - 1)).count('1')
+
+
+def to_signed(fingerprint: int) -> int:
+    """Map an unsigned 64-bit fingerprint onto Postgres' signed bigint range."""
+    return fingerprint - (1 << SIMHASH_BITS) if fingerprint >= 1 << (SIMHASH_BITS - 1) else fingerprint
@@ -0,0 +1,93 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from api.models import DocumentChunk
+from api.renderers import ORJSONRenderer
+from api.utils import get_relevant_chunks
+
+
+class LegacyChatResponseSerializer(serializers.Serializer):
+    """The chat response serializer as it was before the slim read path."""
+    answer = serializers.CharField()
+    relevant_chunks = serializers.ListField(
+        child=serializers.DictField(
+            child=serializers.CharField()
+        )
+    )
+
+
+class Command(BaseCommand):
+    help = 'Compare CPU time and bytes per chat response for the legacy and slim read paths'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=3, help='Top-k to retrieve')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        limit = options['limit']
+        sample = DocumentChunk.objects.values_list('documents', 'embedding').exclude(documents=None).first()
+        if sample is None:
+            self.stdout.write(self.style.WARNING('No document chunks to benchmark.'))
+            return
+        document_id, embedding = sample[0], list(sample[1])
+        chunks = list(get_relevant_chunks('', document_id, limit, query_embedding=embedding))
+        ids = [chunk.id for chunk in chunks]
+        answer = 'A representative answer of a few sentences. ' * 8
+
+        # Fetch: full rows (embedding included) versus only the content
+        def fetch_full():
+            return list(DocumentChunk.objects.filter(id__in=ids))
+
+        def fetch_slim():
+            return list(DocumentChunk.objects.filter(id__in=ids).only('id', 'content'))
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT sum(pg_column_size(content)), sum(pg_column_size(embedding)) '
+                'FROM api_documentchunk WHERE id = ANY(%s::bigint[])', [ids]
+            )
+            content_bytes, embedding_bytes = cursor.fetchone()
+
+        # Serialize: validate + stdlib JSON versus a prebuilt dict + orjson
+        def serialize_legacy():
+            payload = {
+                'answer': answer,
+                'relevant_chunks': [{'text': c.content, 'relevance': c.relevance} for c in chunks],
+            }
+            serializer = LegacyChatResponseSerializer(data=payload)
+            serializer.is_valid(raise_exception=True)
+            return JSONRenderer().render(serializer.data)
+
+        def serialize_slim():
+            return ORJSONRenderer().render({
+                'answer': answer,
+                'relevant_chunks': [{'text': c.content, 'relevance': c.relevance} for c in chunks],
+            })
+
+        self.stdout.write(f'{iterations} iterations, top-{limit} chunks from document {document_id}')
+        self.stdout.write(f"{'step':<12}{'legacy':>14}{'slim':>14}{'saved':>10}")
+
+        for step, legacy, slim in [('fetch', fetch_full, fetch_slim), ('serialize', serialize_legacy, serialize_slim)]:
+            legacy_us = self.time_per_call(legacy, iterations)
+            slim_us = self.time_per_call(slim, iterations)
+            self.stdout.write(
+                f'{step:<12}{legacy_us:>11.1f} us{slim_us:>11.1f} us{1 - slim_us / legacy_us:>10.0%}'
+            )
+
+        legacy_out = len(serialize_legacy())
+        slim_out = len(serialize_slim())
+        self.stdout.write(f"{'rows read':<12}{content_bytes + embedding_bytes:>12} B{content_bytes:>12} B")
+        self.stdout.write(f"{'body':<12}{legacy_out:>12} B{slim_out:>12} B")
+
+    def time_per_call(self, fn, iterations: int) -> float:
+        """Average process CPU time per call in microseconds."""
+        fn()
+        start = time.process_time()
+        for _ in range(iterations):
+            fn()
+        return (time.process_time() - start) / iterations * 1e6
@@ -0,0 +1,94 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from api.models import DocumentChunk
+from api.utils import VECTOR_INDEXES, get_relevant_chunks
+
+MODES = ['none', 'halfvec', 'binary']
+
+# Stored representation of one embedding in each mode, measured with pg_column_size
+VECTOR_EXPRESSIONS = {
+    'none': 'embedding',
+    'halfvec': 'embedding::halfvec(1536)',
+    'binary': 'binary_quantize(embedding)::bit(1536)',
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare memory footprint, recall and latency of the vector quantization modes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=50, help='Number of sampled queries')
+        parser.add_argument('--limit', type=int, default=3, help='Top-k to retrieve')
+        parser.add_argument('--seed', type=float, default=0.0, help='Sampling seed between -1 and 1')
+
+    def handle(self, *args, **options):
+        limit = options['limit']
+
+        # Sample query chunks in SQL so only the sampled embeddings are fetched
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT setseed(%s)', [options['seed']])
+        sample = list(
+            DocumentChunk.objects.filter(documents__isnull=False)
+            .order_by('?')
+            .values_list('id', 'documents', 'embedding')[:options['queries']]
+        )
+        if not sample:
+            self.stdout.write(self.style.WARNING('No document chunks to benchmark.'))
+            return
+        sample_ids = [chunk_id for chunk_id, _, _ in sample]
+
+        def search(mode, document_id, source_id, embedding):
+            # The query's own chunk is always an exact hit, so leave it out of the results
+            chunks = get_relevant_chunks('', document_id, limit + 1, quantization=mode, query_embedding=embedding)
+            return [chunk.id for chunk in chunks if chunk.id != source_id][:limit]
+
+        # Benchmark the index even for documents small enough to be scanned exactly
+        with override_settings(VECTOR_EXACT_SCAN_MAX_CHUNKS=0):
+            # Exact search is the ground truth for recall; with index scans disabled the
+            # planner cannot answer from an approximate full-precision ivfflat index
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_indexscan = off')
+                truth = [
+                    set(search('none', document_id, chunk_id, list(embedding)))
+                    for chunk_id, document_id, embedding in sample
+                ]
+
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT count(*), pg_total_relation_size('api_documentchunk') FROM api_documentchunk")
+                rows, table_size = cursor.fetchone()
+            self.stdout.write(f'{rows} chunks, table size {table_size / 2**20:.1f} MiB')
+            self.stdout.write(
+                f"{'mode':<10}{'vector':>10}{'index MiB':>12}{'recall@' + str(limit):>12}{'p50 ms':>10}{'p95 ms':>10}"
+            )
+
+            for mode in MODES:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'SELECT avg(pg_column_size({VECTOR_EXPRESSIONS[mode]})) '
+                        'FROM api_documentchunk WHERE id = ANY(%s::bigint[])', [sample_ids]
+                    )
+                    vector_bytes = cursor.fetchone()[0]
+                    cursor.execute('SELECT pg_relation_size(to_regclass(%s))', [VECTOR_INDEXES[mode][0]])
+                    index_size = cursor.fetchone()[0]
+
+                latencies = []
+                hits = 0
+                for (chunk_id, document_id, embedding), expected in zip(sample, truth):
+                    start = time.perf_counter()
+                    found = set(search(mode, document_id, chunk_id, list(embedding)))
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    hits += len(found & expected)
+
+                latencies.sort()
+                recall = hits / max(1, sum(len(expected) for expected in truth))
+                p50 = latencies[len(latencies) // 2]
+                p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+                index = f'{index_size / 2**20:.1f}' if index_size is not None else 'not built'
+                self.stdout.write(
+                    f'{mode:<10}{vector_bytes:>8.0f} B{index:>12}{recall:>12.3f}{p50:>10.2f}{p95:>10.2f}'
+                )
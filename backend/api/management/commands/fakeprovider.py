@@ -0,0 +1,104 @@
+import base64
+import hashlib
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+
+def fake_embedding(value, dimensions: int = 1536) -> np.ndarray:
+    """Deterministic unit vector derived from the input text or tokens."""
+    seed = int.from_bytes(hashlib.sha256(repr(value).encode()).digest()[:8], 'little')
+    vector = np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def make_server(port: int = 0, latency: float = 0.0, error_rate: float = 0.0, log=None) -> ThreadingHTTPServer:
+    """
+    Build the fake provider server; port 0 picks a free port (see server.server_port).
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, payload: dict, headers: dict = None):
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            time.sleep(latency)
+
+            if random.random() < error_rate:
+                self._send(429, {'error': {'message': 'Rate limit reached', 'type': 'requests', 'code': 'rate_limit_exceeded'}}, {'Retry-After': '1'})
+                return
+
+            if self.path.endswith('/embeddings'):
+                inputs = request.get('input', [])
+                if not isinstance(inputs, list) or (inputs and isinstance(inputs[0], int)):
+                    inputs = [inputs]
+                data = []
+                for i, value in enumerate(inputs):
+                    vector = fake_embedding(value)
+                    if request.get('encoding_format') == 'base64':
+                        embedding = base64.b64encode(vector.tobytes()).decode()
+                    else:
+                        embedding = vector.tolist()
+                    data.append({'object': 'embedding', 'index': i, 'embedding': embedding})
+                self._send(200, {
+                    'object': 'list',
+                    'data': data,
+                    'model': request.get('model'),
+                    'usage': {'prompt_tokens': 0, 'total_tokens': 0},
+                })
+            elif self.path.endswith('/chat/completions'):
+                self._send(200, {
+                    'id': 'chatcmpl-fake',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': request.get('model'),
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': 'This is a fake answer.'},
+                        'finish_reason': 'stop',
+                    }],
+                    'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+                })
+            else:
+                self._send(404, {'error': {'message': f'Unknown path {self.path}'}})
+
+        def log_message(self, format, *args):
+            if log is not None:
+                log(format % args)
+
+    return ThreadingHTTPServer(('0.0.0.0', port), Handler)
+
+
+class Command(BaseCommand):
+    help = 'Run a local OpenAI-compatible fake server that injects latency and 429s'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8100)
+        parser.add_argument('--latency', type=float, default=0.05, help='Seconds added to every request')
+        parser.add_argument('--error-rate', type=float, default=0.1, help='Fraction of requests answered with 429')
+
+    def handle(self, *args, **options):
+        latency = options['latency']
+        error_rate = options['error_rate']
+        server = make_server(options['port'], latency, error_rate, log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f"Fake provider listening on http://localhost:{options['port']}/v1 "
+            f"(latency={latency}s, error_rate={error_rate})"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
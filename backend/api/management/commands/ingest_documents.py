@@ -0,0 +1,178 @@
+import csv
+import io
+import os
+import time
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+
+from api.dedup import content_hash, simhash, to_signed
+from api.models import Document, DocumentChunk
+from api.utils import extract_text_from_file, provider, text_splitter
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.txt')
+
+
+def prepare_file(path: str):
+    """Extract, split and fingerprint one file. Runs in a worker process."""
+    try:
+        with open(path, 'rb') as f:
+            text = extract_text_from_file(f.read(), path)
+        chunks = [
+            (chunk, content_hash(chunk), simhash(chunk))
+            for chunk in text_splitter.split_text(text)
+        ]
+        return path, chunks, None
+    except Exception as e:
+        return path, None, str(e)
+
+
+class Command(BaseCommand):
+    help = 'Bulk ingest a directory tree of PDF and TXT documents with resumable checkpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Directory to ingest recursively')
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Extraction processes')
+        parser.add_argument('--prefetch', type=int, default=2, help='Files each worker may extract ahead of storage')
+        parser.add_argument('--batch-size', type=int, default=256, help='Chunks per embedding request')
+        parser.add_argument('--checkpoint', help='Checkpoint file (default: <directory>/.ingest_checkpoint)')
+
+    def handle(self, *args, **options):
+        root = Path(options['directory']).resolve()
+        if not root.is_dir():
+            raise CommandError(f'{root} is not a directory')
+        checkpoint = Path(options['checkpoint'] or root / '.ingest_checkpoint')
+
+        done = set()
+        if checkpoint.exists():
+            done = set(checkpoint.read_text().splitlines())
+
+        pending = sorted(
+            str(path) for path in root.rglob('*')
+            if path.is_file() and path.suffix.lower() in SUPPORTED_EXTENSIONS
+            and str(path.relative_to(root)) not in done
+        )
+        self.stdout.write(f'{len(pending)} files to ingest ({len(done)} already checkpointed)')
+        if not pending:
+            return
+
+        # Workers are forked and never touch the database
+        connections.close_all()
+
+        start = time.monotonic()
+        files = chunks_total = chunks_new = 0
+        with Pool(options['workers']) as pool, checkpoint.open('a') as checkpoint_file:
+            # Only a bounded window of files is extracted ahead of the single storing
+            # consumer, so extracted text never piles up in this process
+            paths = iter(pending)
+            in_flight = deque(
+                pool.apply_async(prepare_file, (path,))
+                for path in islice(paths, options['workers'] * options['prefetch'])
+            )
+            while in_flight:
+                path, chunks, error = in_flight.popleft().get()
+                next_path = next(paths, None)
+                if next_path is not None:
+                    in_flight.append(pool.apply_async(prepare_file, (next_path,)))
+
+                relative = str(Path(path).relative_to(root))
+                if error:
+                    self.stderr.write(self.style.ERROR(f'{relative}: {error}'))
+                    continue
+
+                new = self.store_document(Path(path).name, chunks, options['batch_size'])
+                checkpoint_file.write(relative + '\n')
+                checkpoint_file.flush()
+
+                files += 1
+                chunks_total += len(chunks)
+                chunks_new += new
+                elapsed = time.monotonic() - start
+                self.stdout.write(
+                    f'[{files}/{len(pending)}] {relative}: {len(chunks)} chunks ({new} new) '
+                    f'| {files / elapsed:.2f} files/s, {chunks_total / elapsed:.1f} chunks/s'
+                )
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Ingested {files} files, {chunks_total} chunks ({chunks_new} embedded) in {elapsed:.1f}s'
+        ))
+
+    def store_document(self, title, chunks, batch_size) -> int:
+        """Embed new chunks in batches and COPY them in; returns how many were new."""
+        # Identical chunks are stored once, within the file and across the database
+        unique = {}
+        for text, digest, fingerprint in chunks:
+            unique.setdefault(digest, (text, fingerprint))
+        existing = set(
+            DocumentChunk.objects.filter(content_hash__in=list(unique)).values_list('content_hash', flat=True)
+        )
+        rows = [(digest, text, fingerprint) for digest, (text, fingerprint) in unique.items() if digest not in existing]
+
+        embeddings = []
+        for i in range(0, len(rows), batch_size):
+            embeddings += provider.embed_documents([text for _, text, _ in rows[i:i + batch_size]])
+
+        with transaction.atomic():
+            document = Document.objects.create(title=title)
+            with connection.cursor() as cursor:
+                cursor.execute('''
+                    CREATE TEMP TABLE chunk_staging (
+                        content text,
+                        content_hash varchar(64),
+                        simhash bigint,
+                        embedding vector(1536)
+                    ) ON COMMIT DROP
+                ''')
+                cursor.copy_expert('COPY chunk_staging FROM STDIN WITH (FORMAT csv)', self.csv_buffer(rows, embeddings))
+                # Chunks stored concurrently by the API are kept and simply referenced
+                cursor.execute('''
+                    INSERT INTO api_documentchunk (content, content_hash, simhash, embedding)
+                    SELECT content, content_hash, simhash, embedding FROM chunk_staging
+                    ON CONFLICT (content_hash) DO NOTHING
+                ''')
+                # Lock every referenced chunk so a concurrent document delete cannot remove it
+                cursor.execute(
+                    'SELECT id, content_hash FROM api_documentchunk WHERE content_hash = ANY(%s) FOR SHARE',
+                    [list(unique)]
+                )
+                chunk_ids = dict(cursor.fetchall())
+                found = set(chunk_ids.values())
+
+                # Chunks deleted since the lookup above have to be embedded after all
+                missing = [(digest, *unique[digest]) for digest in unique if digest not in found]
+                if missing:
+                    missing_embeddings = provider.embed_documents([text for _, text, _ in missing])
+                    cursor.execute('TRUNCATE chunk_staging')
+                    cursor.copy_expert('COPY chunk_staging FROM STDIN WITH (FORMAT csv)', self.csv_buffer(missing, missing_embeddings))
+                    cursor.execute('''
+                        INSERT INTO api_documentchunk (content, content_hash, simhash, embedding)
+                        SELECT content, content_hash, simhash, embedding FROM chunk_staging
+                        RETURNING id, content_hash
+                    ''')
+                    chunk_ids.update(cursor.fetchall())
+                    rows += missing
+
+                cursor.execute('''
+                    INSERT INTO api_documentchunk_documents (documentchunk_id, document_id)
+                    SELECT unnest(%s::bigint[]), %s
+                    ON CONFLICT DO NOTHING
+                ''', [list(chunk_ids), document.id])
+        return len(rows)
+
+    def csv_buffer(self, rows, embeddings) -> io.StringIO:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for (digest, text, fingerprint), embedding in zip(rows, embeddings):
+            writer.writerow([
+                text,
+                digest,
+                to_signed(fingerprint),
+                '[' + ','.join(map(str, embedding)) + ']',
+            ])
+        buffer.seek(0)
+        return buffer
@@ -0,0 +1,105 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+
+from api.utils import VECTOR_INDEXES
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or re-tune a vector index concurrently, without blocking reads or writes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quantization', choices=list(VECTOR_INDEXES), default=settings.VECTOR_QUANTIZATION,
+                            help='Which vector index to rebuild (default: VECTOR_QUANTIZATION)')
+        parser.add_argument('--method', choices=['ivfflat', 'hnsw'], default='ivfflat')
+        parser.add_argument('--lists', type=int, help='ivfflat lists (default: rows / 1000, or sqrt(rows) above 1M rows)')
+        parser.add_argument('--m', type=int, default=16, help='hnsw max connections per layer')
+        parser.add_argument('--ef-construction', type=int, default=64, help='hnsw candidate list size while building')
+        parser.add_argument('--probes', type=int, help='Set ivfflat.probes for new connections')
+        parser.add_argument('--ef-search', type=int, help='Set hnsw.ef_search for new connections')
+        parser.add_argument('--maintenance-work-mem', default='1GB', help='Memory available to the index build')
+        parser.add_argument('--keep-other-indexes', action='store_true',
+                            help='Keep the indexes of the other quantization modes (e.g. to benchmark them)')
+
+    def handle(self, *args, **options):
+        name, expression = VECTOR_INDEXES[options['quantization']]
+        staging_name = f'{name}_rebuild'
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM api_documentchunk')
+            rows = cursor.fetchone()[0]
+
+        if options['method'] == 'ivfflat':
+            lists = options['lists'] or max(1, rows // 1000 if rows <= 1_000_000 else int(math.sqrt(rows)))
+            build_options = f'lists = {lists}'
+        else:
+            build_options = f"m = {options['m']}, ef_construction = {options['ef_construction']}"
+
+        self.stdout.write(f'Building {options["method"]} index {name} over {rows} rows ({build_options})')
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET maintenance_work_mem = %s', [options['maintenance_work_mem']])
+            cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {staging_name}')
+
+            done = threading.Event()
+            progress = threading.Thread(target=self.report_progress, args=(done,), daemon=True)
+            progress.start()
+            start = time.monotonic()
+            try:
+                # CONCURRENTLY builds alongside live traffic; the old index keeps serving until the swap
+                cursor.execute(
+                    f'CREATE INDEX CONCURRENTLY {staging_name} ON api_documentchunk '
+                    f'USING {options["method"]} ({expression}) WITH ({build_options})'
+                )
+            finally:
+                done.set()
+                progress.join()
+            elapsed = time.monotonic() - start
+
+            cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+            cursor.execute(f'ALTER INDEX {staging_name} RENAME TO {name}')
+
+            # Searches only use the index of the configured mode; the others just cost memory and writes.
+            # The configured mode's index is never dropped, even when rebuilding another one.
+            if not options['keep_other_indexes']:
+                for mode, (other_name, _) in VECTOR_INDEXES.items():
+                    if mode not in (options['quantization'], settings.VECTOR_QUANTIZATION):
+                        cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {other_name}')
+                        self.stdout.write(f'Dropped {other_name}')
+
+            database = connection.ops.quote_name(connection.settings_dict['NAME'])
+            if options['probes'] is not None:
+                cursor.execute(f'ALTER DATABASE {database} SET ivfflat.probes = %s', [options['probes']])
+            if options['ef_search'] is not None:
+                cursor.execute(f'ALTER DATABASE {database} SET hnsw.ef_search = %s', [options['ef_search']])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {name} in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s)'
+        ))
+
+    def report_progress(self, done: threading.Event):
+        """Poll pg_stat_progress_create_index from a separate connection while the build runs."""
+        start = time.monotonic()
+        try:
+            while not done.wait(5):
+                with connections['default'].cursor() as cursor:
+                    cursor.execute('''
+                        SELECT phase, tuples_done, tuples_total, blocks_done, blocks_total
+                        FROM pg_stat_progress_create_index
+                        WHERE relid = 'api_documentchunk'::regclass
+                    ''')
+                    row = cursor.fetchone()
+                if row is None:
+                    continue
+                phase, tuples_done, tuples_total, blocks_done, blocks_total = row
+                elapsed = time.monotonic() - start
+                self.stdout.write(
+                    f'  {phase}: tuples {tuples_done}/{tuples_total}, blocks {blocks_done}/{blocks_total} '
+                    f'| {tuples_done / elapsed:.0f} tuples/s'
+                )
+        finally:
+            connections['default'].close()
@@ -0,0 +1,66 @@
+from django.db import migrations, models
+
+from api.dedup import content_hash, simhash, to_signed
+
+BATCH_SIZE = 1000
+
+
+def deduplicate_chunks(apps, schema_editor):
+    """Fingerprint existing chunks and merge exact duplicates into one shared row."""
+    DocumentChunk = apps.get_model('api', 'DocumentChunk')
+    Through = DocumentChunk.documents.through
+
+    # Only the fingerprints need Python; rows are flushed a batch at a time
+    batch = []
+    for chunk in DocumentChunk.objects.only('id', 'content').order_by('id').iterator(chunk_size=BATCH_SIZE):
+        chunk.content_hash = content_hash(chunk.content)
+        chunk.simhash = to_signed(simhash(chunk.content))
+        batch.append(chunk)
+        if len(batch) == BATCH_SIZE:
+            DocumentChunk.objects.bulk_update(batch, ['content_hash', 'simhash'])
+            batch = []
+    DocumentChunk.objects.bulk_update(batch, ['content_hash', 'simhash'])
+
+    # Point every document at the oldest copy of each content, then drop the other copies
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'''
+            WITH keep AS (
+                SELECT content_hash, min(id) AS id FROM api_documentchunk GROUP BY content_hash
+            )
+            INSERT INTO {Through._meta.db_table} (documentchunk_id, document_id)
+            SELECT DISTINCT keep.id, chunk.document_id
+            FROM api_documentchunk chunk JOIN keep USING (content_hash)
+            ON CONFLICT DO NOTHING
+        ''')
+        cursor.execute('''
+            DELETE FROM api_documentchunk chunk
+            USING (
+                SELECT content_hash, min(id) AS id FROM api_documentchunk GROUP BY content_hash
+            ) keep
+            WHERE chunk.content_hash = keep.content_hash AND chunk.id <> keep.id
+        ''')
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('api', '0005_update_vector_field'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentchunk',
+            name='content_hash',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='documentchunk',
+            name='simhash',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='documentchunk',
+            name='documents',
+            field=models.ManyToManyField(related_name='shared_chunks', to='api.document'),
+        ),
+        migrations.RunPython(deduplicate_chunks, reverse_code=migrations.RunPython.noop),
+    ]
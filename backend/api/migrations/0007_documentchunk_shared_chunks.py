@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Kept separate from 0006 so the data migration commits before the schema changes
+    dependencies = [
+        ('api', '0006_deduplicate_chunks'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='documentchunk',
+            name='document',
+        ),
+        migrations.AlterField(
+            model_name='documentchunk',
+            name='documents',
+            field=models.ManyToManyField(related_name='chunks', to='api.document'),
+        ),
+        migrations.AlterField(
+            model_name='documentchunk',
+            name='content_hash',
+            field=models.CharField(max_length=64, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='documentchunk',
+            name='simhash',
+            field=models.BigIntegerField(),
+        ),
+    ]
@@ -15,15 +15,18 @@ class Document(models.Model):
 
 class DocumentChunk(models.Model):
     """
-    Model representing a chunk of text from a document with its embedding
+    Model representing a unique chunk of text with its embedding.
+    Chunks with identical content are stored once and shared by every document containing them.
     """
-    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='chunks')
+    documents = models.ManyToManyField(Document, related_name='chunks')
     content = models.TextField()
+    content_hash = models.CharField(max_length=64, unique=True)  # SHA-256 of normalized content
+    simhash = models.BigIntegerField()  # Near-duplicate fingerprint, used to diversify retrieval results
     embedding = VectorField(dimensions=1536)  # OpenAI embedding size
     relevance = models.FloatField(null=True)  # Used to store similarity scores during retrieval
 
     def __str__(self):
-        return f"Chunk of {self.document.title}"
+        return f"Chunk {self.content_hash[:12]}"
 
 class Message(models.Model):
     """
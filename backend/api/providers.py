@@ -0,0 +1,155 @@
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, TypeVar
+
+import openai
+
+T = TypeVar('T')
+
+# Errors worth retrying: quota/rate limits and transient upstream failures
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class ProviderUnavailable(Exception):
+    """Raised when the provider keeps failing after all retries."""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read the provider's Retry-After hint from an error response, if any."""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if 'retry-after-ms' in headers:
+            return float(headers['retry-after-ms']) / 1000
+        if 'retry-after' in headers:
+            return float(headers['retry-after'])
+    except ValueError:
+        pass
+    return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at `rate` tokens per second
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` are available, then consume them."""
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ProviderClient:
+    """
+    Shared gateway to the model provider.
+
+    Every call is rate limited by a token bucket, capped by a semaphore and
+    retried with exponential backoff and full jitter. Identical concurrent
+    embedding requests are coalesced into a single upstream call. All of this
+    state is per process, so the limits must be sized for the number of
+    processes sharing the provider quota.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        llm,
+        requests_per_minute: int = 3000,
+        max_concurrency: int = 8,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+    ):
+        self.embeddings = embeddings
+        self.llm = llm
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        rate = requests_per_minute / 60.0
+        self._bucket = TokenBucket(rate=rate, capacity=max(1.0, rate))
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            # Never retry sooner than the provider asked us to
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def call(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Run a provider call under the rate limit, concurrency cap and retry policy."""
+        attempt = 0
+        while True:
+            self._bucket.acquire()
+            try:
+                with self._semaphore:
+                    return fn(*args, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                retry_after = retry_after_seconds(e)
+                if attempt >= self.max_retries:
+                    if retry_after is None:
+                        retry_after = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                    raise ProviderUnavailable(str(e), retry_after=retry_after) from e
+            time.sleep(self._backoff(attempt, retry_after))
+            attempt += 1
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single text, sharing the result with identical in-flight requests."""
+        with self._inflight_lock:
+            future = self._inflight.get(text)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[text] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(self.call(self.embeddings.embed_query, text))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._inflight_lock:
+                del self._inflight[text]
+        return future.result()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts in a single provider call."""
+        return self.call(self.embeddings.embed_documents, texts)
+
+    def invoke(self, runnable, inputs: dict):
+        """Invoke a LangChain runnable (e.g. a prompt | llm chain) through the client."""
+        return self.call(runnable.invoke, inputs)
@@ -0,0 +1,17 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer backed by orjson, falling back to DRF's encoder for
+    types orjson does not handle natively (e.g. Decimal, lazy strings).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # orjson only supports two-space indentation, which is what the browsable API asks for
+        option = orjson.OPT_INDENT_2 if self.get_indent(accepted_media_type, renderer_context or {}) else 0
+        return orjson.dumps(data, default=JSONEncoder().default, option=option)
@@ -23,13 +23,16 @@ class ChatRequestSerializer(serializers.Serializer):
     message = serializers.CharField(required=True)
     document_id = serializers.IntegerField(required=True)
 
+class RelevantChunkSerializer(serializers.Serializer):
+    text = serializers.CharField()
+    relevance = serializers.FloatField()
+
 class ChatResponseSerializer(serializers.Serializer):
+    """
+    Documents the chat response schema; the view builds the payload directly.
+    """
     answer = serializers.CharField()
-    relevant_chunks = serializers.ListField(
-        child=serializers.DictField(
-            child=serializers.CharField()
-        )
-    )
+    relevant_chunks = RelevantChunkSerializer(many=True)
 
 class HealthCheckSerializer(serializers.Serializer):
     status = serializers.CharField()
@@ -1,3 +1,179 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+import httpx
+import openai
+from django.test import SimpleTestCase
+from langchain_openai import OpenAIEmbeddings
+from rest_framework.test import APIRequestFactory
+
+from .dedup import content_hash, hamming_distance, simhash, to_signed
+from .management.commands.fakeprovider import make_server
+from .providers import ProviderClient, ProviderUnavailable, TokenBucket
+from .renderers import ORJSONRenderer
+from .views import chat
+
+
+def rate_limit_error(retry_after=None):
+    headers = {'retry-after': retry_after} if retry_after is not None else {}
+    request = httpx.Request('POST', 'http://provider.test/v1/embeddings')
+    response = httpx.Response(429, request=request, headers=headers)
+    return openai.RateLimitError('Rate limit reached', response=response, body=None)
+
+
+class FakeEmbeddings:
+    """Counts upstream calls; the first `failures` calls raise a 429."""
+
+    def __init__(self, delay: float = 0.0, failures: int = 0, retry_after=None):
+        self.delay = delay
+        self.failures = failures
+        self.retry_after = retry_after
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def embed_query(self, text):
+        with self._lock:
+            self.calls += 1
+            fail = self.calls <= self.failures
+        time.sleep(self.delay)
+        if fail:
+            raise rate_limit_error(self.retry_after)
+        return [float(len(text))]
+
+
+def make_client(embeddings, **kwargs):
+    kwargs.setdefault('backoff_base', 0.001)
+    kwargs.setdefault('backoff_max', 0.01)
+    return ProviderClient(embeddings, None, **kwargs)
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_bursts_to_capacity_then_waits_for_refill(self):
+        bucket = TokenBucket(rate=20, capacity=2)
+        start = time.monotonic()
+        for _ in range(4):
+            bucket.acquire()
+        elapsed = time.monotonic() - start
+        # Two tokens come from the burst, two more refill at 20/s
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertLess(elapsed, 0.5)
+
+
+class ProviderClientTests(SimpleTestCase):
+    def test_identical_concurrent_embeddings_are_coalesced(self):
+        embeddings = FakeEmbeddings(delay=0.3)
+        client = make_client(embeddings)
+        barrier = threading.Barrier(10)
+        results = []
+
+        def embed():
+            barrier.wait()
+            results.append(client.embed_query('same text'))
+
+        threads = [threading.Thread(target=embed) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(embeddings.calls, 1)
+        self.assertEqual(results, [[9.0]] * 10)
+
+    def test_retries_rate_limits_until_success(self):
+        embeddings = FakeEmbeddings(failures=2)
+        self.assertEqual(make_client(embeddings).embed_query('text'), [4.0])
+        self.assertEqual(embeddings.calls, 3)
+
+    def test_exhausted_retries_raise_with_upstream_retry_after(self):
+        embeddings = FakeEmbeddings(failures=100, retry_after='7')
+        with self.assertRaises(ProviderUnavailable) as ctx:
+            make_client(embeddings, max_retries=2).embed_query('text')
+        self.assertEqual(embeddings.calls, 3)
+        self.assertEqual(ctx.exception.retry_after, 7.0)
+
+    def test_failed_call_is_not_coalesced_into_later_requests(self):
+        embeddings = FakeEmbeddings(failures=1)
+        client = make_client(embeddings, max_retries=0)
+        with self.assertRaises(ProviderUnavailable):
+            client.embed_query('text')
+        self.assertEqual(client.embed_query('text'), [4.0])
+
+
+class FakeProviderTests(SimpleTestCase):
+    def start_server(self, error_rate: float) -> str:
+        server = make_server(error_rate=error_rate)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return f'http://127.0.0.1:{server.server_port}/v1'
+
+    def make_client(self, base_url: str, **kwargs):
+        embeddings = OpenAIEmbeddings(
+            model='text-embedding-ada-002',
+            base_url=base_url,
+            api_key='test',
+            max_retries=0,
+            check_embedding_ctx_length=False,
+        )
+        return make_client(embeddings, **kwargs)
+
+    def test_embeds_through_fake_server(self):
+        vector = self.make_client(self.start_server(error_rate=0.0)).embed_query('hello')
+        self.assertEqual(len(vector), 1536)
+
+    def test_persistent_429s_raise_provider_unavailable(self):
+        client = self.make_client(self.start_server(error_rate=1.0), max_retries=2)
+        with self.assertRaises(ProviderUnavailable) as ctx:
+            client.embed_query('hello')
+        self.assertEqual(ctx.exception.retry_after, 1.0)
+
+
+class ChatViewTests(SimpleTestCase):
+    @mock.patch('api.views.get_relevant_chunks', side_effect=ProviderUnavailable('busy', retry_after=2.5))
+    @mock.patch('api.views.get_object_or_404')
+    def test_provider_unavailable_returns_503_with_retry_after(self, get_object_or_404, get_relevant_chunks):
+        request = APIRequestFactory().post('/api/chat/', {'message': 'hi', 'document_id': 1}, format='json')
+        response = chat(request)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '3')
+
+
+class DedupTests(SimpleTestCase):
+    text = (
+        'This document is confidential and intended solely for the named recipient. '
+        'If you received it in error, notify the sender and delete all copies. '
+    ) * 4
+
+    def test_content_hash_ignores_whitespace_only(self):
+        self.assertEqual(content_hash('Output:   5 MW\n'), content_hash('Output: 5 MW'))
+        self.assertNotEqual(content_hash('Output: 5 MW'), content_hash('output: 5 mw'))
+        self.assertNotEqual(content_hash('hello world'), content_hash('hello there'))
+
+    def test_simhash_is_close_for_near_duplicates(self):
+        edited = self.text.replace('solely', 'only', 1)
+        self.assertLessEqual(hamming_distance(simhash(self.text), simhash(edited)), 8)
+
+    def test_simhash_is_far_for_unrelated_text(self):
+        other = 'Quarterly revenue grew in every region, led by strong demand for support contracts.'
+        self.assertGreater(hamming_distance(simhash(self.text), simhash(other)), 10)
+
+    def test_chunks_without_words_get_distinct_fingerprints(self):
+        self.assertNotEqual(simhash('-- -- --'), simhash('== == =='))
+        self.assertNotEqual(simhash('----'), 0)
+
+    def test_to_signed_fits_bigint_and_preserves_distance(self):
+        a, b = simhash(self.text), simhash('something else entirely')
+        for value in (a, b, (1 << 64) - 1):
+            self.assertGreaterEqual(to_signed(value), -(1 << 63))
+            self.assertLess(to_signed(value), 1 << 63)
+        self.assertEqual(hamming_distance(to_signed(a), to_signed(b)), hamming_distance(a, b))
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def test_renders_compact_json_by_default(self):
+        self.assertEqual(ORJSONRenderer().render({'a': [1, 2.5]}), b'{"a":[1,2.5]}')
+
+    def test_honors_indent_from_renderer_context(self):
+        rendered = ORJSONRenderer().render({'a': 1}, renderer_context={'indent': 4})
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
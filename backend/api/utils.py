@@ -1,5 +1,5 @@
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document as LangChainDocument
@@ -10,20 +10,37 @@ import PyPDF2
 from pgvector.django import CosineDistance, VectorField
 from pgvector.sqlalchemy import Vector
 from .models import Document, DocumentChunk
+from .dedup import content_hash, simhash, hamming_distance, to_signed
 from django.contrib.postgres.expressions import ArrayField
 from django.db.models.functions import Cast
 from django.db.models import FloatField
 from django.db.models import F
 from django.db.models.expressions import RawSQL
+from django.db import connection, transaction
+from django.conf import settings
+from .providers import ProviderClient
 
 # Initialize OpenAI components
+# Retries are handled by the provider client, so the SDK must not retry on its own
 embeddings = OpenAIEmbeddings(
     model="text-embedding-ada-002",
+    base_url=settings.OPENAI_BASE_URL,
+    max_retries=0,
 )
 
 llm = ChatOpenAI(
     model="gpt-3.5-turbo",
     temperature=0.7,
+    base_url=settings.OPENAI_BASE_URL,
+    max_retries=0,
+)
+
+provider = ProviderClient(
+    embeddings,
+    llm,
+    requests_per_minute=settings.OPENAI_REQUESTS_PER_MINUTE,
+    max_concurrency=settings.OPENAI_MAX_CONCURRENCY,
+    max_retries=settings.OPENAI_MAX_RETRIES,
 )
 
 text_splitter = RecursiveCharacterTextSplitter(
@@ -57,6 +74,70 @@ def extract_text_from_file(content: bytes, filename: str) -> str:
     else:
         raise ValueError("Unsupported file type. Only PDF and TXT files are supported.")
 
+# Chunks sent to the provider per embedding request
+EMBEDDING_BATCH_SIZE = 256
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """Embed texts in batches through the provider client."""
+    embedded = []
+    for i in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        embedded += provider.embed_documents(texts[i:i + EMBEDDING_BATCH_SIZE])
+    return embedded
+
+def lock_chunks(digests: List[str]) -> Dict[str, int]:
+    """
+    Map content hashes to stored chunk ids, locking the rows FOR SHARE so a
+    concurrent document delete cannot remove them before they are referenced.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT content_hash, id FROM api_documentchunk WHERE content_hash = ANY(%s) FOR SHARE',
+            [digests]
+        )
+        return dict(cursor.fetchall())
+
+def insert_chunks(texts: Dict[str, str], embedded: List[List[float]]):
+    """Insert new chunks, skipping any stored concurrently with the same content."""
+    DocumentChunk.objects.bulk_create([
+        DocumentChunk(
+            content=text,
+            content_hash=digest,
+            simhash=to_signed(simhash(text)),
+            embedding=embedding
+        )
+        for (digest, text), embedding in zip(texts.items(), embedded)
+    ], ignore_conflicts=True)
+
+def store_chunks(document: Document, texts: List[str]) -> int:
+    """
+    Reference deduplicated chunks from a document; returns how many were embedded.
+
+    New content is embedded before the transaction opens, so locks on shared
+    chunks are only held while rows are inserted and referenced.
+    """
+    unique = {}
+    for text in texts:
+        unique.setdefault(content_hash(text), text)
+
+    existing = set(
+        DocumentChunk.objects.filter(content_hash__in=list(unique)).values_list('content_hash', flat=True)
+    )
+    new = {digest: text for digest, text in unique.items() if digest not in existing}
+    embedded = embed_texts(list(new.values()))
+
+    with transaction.atomic():
+        insert_chunks(new, embedded)
+        chunk_ids = lock_chunks(list(unique))
+
+        # Chunks deleted since the lookup above have to be embedded after all
+        missing = {digest: text for digest, text in unique.items() if digest not in chunk_ids}
+        if missing:
+            insert_chunks(missing, embed_texts(list(missing.values())))
+            chunk_ids.update(lock_chunks(list(missing)))
+
+        document.chunks.add(*chunk_ids.values())
+    return len(new) + len(missing)
+
 def process_document(document_id: int, content: bytes, filename: str):
     # Extract text based on file type
     text = extract_text_from_file(content, filename)
@@ -69,32 +150,110 @@ def process_document(document_id: int, content: bytes, filename: str):
     
     document = Document.objects.get(id=document_id)
     
-    # Create document chunks with embeddings
-    for chunk in chunks:
-        embedding = embeddings.embed_query(chunk.page_content)
-        DocumentChunk.objects.create(
-            document=document,
-            content=chunk.page_content,
-            embedding=embedding
-        )
+    # Reference deduplicated chunks, embedding only content not seen before
+    store_chunks(document, [chunk.page_content for chunk in chunks])
+
+def delete_document(document: Document):
+    """Delete a document along with the chunks no other document references."""
+    with transaction.atomic():
+        chunk_ids = list(document.chunks.values_list('id', flat=True))
+        document.delete()
+        # Wait for uploads that hold these chunks FOR SHARE, then re-check references
+        # in a fresh statement so chunks they just referenced are kept
+        list(DocumentChunk.objects.select_for_update().filter(id__in=chunk_ids).values_list('id', flat=True))
+        DocumentChunk.objects.filter(id__in=chunk_ids, documents=None).delete()
+
+# Distance expressions used for the cheap candidate scan of each quantization mode.
+# They match the expression indexes built by `manage.py rebuild_vector_index`.
+QUANTIZED_DISTANCES = {
+    'halfvec': "embedding::halfvec(1536) <=> %s::halfvec(1536)",
+    'binary': "binary_quantize(embedding)::bit(1536) <~> binary_quantize(%s::vector)",
+}
+
+# Extra results fetched so near-duplicates can be dropped from the top-k
+NEAR_DUPLICATE_OVERFETCH = 3
+
+# ANN index name and indexed expression with operator class for each quantization mode
+VECTOR_INDEXES = {
+    'none': ('document_chunks_embedding_idx', "embedding vector_cosine_ops"),
+    'halfvec': ('document_chunks_embedding_half_idx', "(embedding::halfvec(1536)) halfvec_cosine_ops"),
+    'binary': ('document_chunks_embedding_bit_idx', "(binary_quantize(embedding)::bit(1536)) bit_hamming_ops"),
+}
+
+def get_relevant_chunks(query: str, document_id: int, limit: int = 3,
+                        quantization: Optional[str] = None,
+                        query_embedding: Optional[List[float]] = None) -> List[DocumentChunk]:
+    """
+    Get relevant document chunks for a query using vector similarity.
+
+    With a quantization mode the search runs in two phases: a shortlist is
+    taken from the compact quantized index, then re-ranked with exact
+    full-precision cosine similarity.
+    """
+    if quantization is None:
+        quantization = settings.VECTOR_QUANTIZATION
+    if quantization != 'none' and quantization not in QUANTIZED_DISTANCES:
+        raise ValueError(f"Unknown vector quantization mode: {quantization}")
 
-def get_relevant_chunks(query: str, document_id: int, limit: int = 3) -> List[DocumentChunk]:
-    """Get relevant document chunks for a query using vector similarity."""
     # Get query embedding
-    query_embedding = embeddings.embed_query(query)
+    if query_embedding is None:
+        query_embedding = provider.embed_query(query)
     
     # Convert embedding to string for SQL
     embedding_str = '[' + ','.join(map(str, query_embedding)) + ']'
     
-    # Get chunks ordered by similarity using pgvector's <=> operator
-    chunks = DocumentChunk.objects.filter(document_id=document_id)\
+    chunks = DocumentChunk.objects.filter(documents=document_id)
+    shortlist = limit * settings.VECTOR_RERANK_FACTOR
+
+    # Small documents are cheaper to scan exactly than to pull out of a global ANN index
+    if quantization != 'none' and \
+            DocumentChunk.documents.through.objects.filter(document_id=document_id).count() \
+            <= max(shortlist, settings.VECTOR_EXACT_SCAN_MAX_CHUNKS):
+        quantization = 'none'
+
+    if quantization != 'none':
+        candidates = chunks\
+            .annotate(
+                quantized_distance=RawSQL(QUANTIZED_DISTANCES[quantization], [embedding_str])
+            )\
+            .order_by('quantized_distance')\
+            .values('id')[:shortlist]
+        chunks = DocumentChunk.objects.filter(id__in=candidates)
+
+    # Get chunks ordered by similarity using pgvector's <=> operator.
+    # Only the content is loaded; the 1536-dim embedding never leaves the database.
+    chunks = chunks\
+        .only('id', 'content', 'simhash')\
         .annotate(
             similarity_score=RawSQL(
                 "1 - (embedding::vector <=> %s::vector)", 
                 [embedding_str]
             )
         )\
-        .order_by('-similarity_score')[:limit]
+        .order_by('-similarity_score')[:limit * NEAR_DUPLICATE_OVERFETCH]
+
+    with transaction.atomic():
+        if quantization != 'none':
+            # The document filter is applied after the index scan, so keep scanning
+            # the index (HNSW or ivfflat) until the shortlist is filled (pgvector >= 0.8)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT set_config('hnsw.iterative_scan', 'relaxed_order', true), "
+                    "set_config('hnsw.ef_search', %s, true), "
+                    "set_config('ivfflat.iterative_scan', 'relaxed_order', true), "
+                    "set_config('ivfflat.max_probes', %s, true)",
+                    [str(max(40, shortlist)), str(settings.VECTOR_IVFFLAT_MAX_PROBES)]
+                )
+        ranked = list(chunks)
+
+    # Drop near-duplicates of better-ranked chunks (repeated headers, footers,
+    # boilerplate) so they don't crowd out useful results
+    chunks = []
+    for chunk in ranked:
+        if all(hamming_distance(chunk.simhash, kept.simhash) > settings.CHUNK_DEDUP_MAX_DISTANCE for kept in chunks):
+            chunks.append(chunk)
+            if len(chunks) == limit:
+                break
     
     # Add relevance scores to chunks
     for chunk in chunks:
@@ -128,7 +287,7 @@ Question: {question}""")
     chain = prompt | llm | StrOutputParser()
     
     # Generate response
-    response = chain.invoke({
+    response = provider.invoke(chain, {
         "context": context,
         "question": message
     })
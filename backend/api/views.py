@@ -2,7 +2,10 @@ from django.shortcuts import render, get_object_or_404
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
+from rest_framework.exceptions import APIException
+from drf_spectacular.utils import extend_schema
 from django.conf import settings
+import math
 import os
 
 from .models import Document, DocumentChunk, Message
@@ -14,7 +17,8 @@ from .serializers import (
     ChatResponseSerializer,
     HealthCheckSerializer
 )
-from .utils import process_document, get_relevant_chunks, get_chat_response
+from .utils import process_document, get_relevant_chunks, get_chat_response, delete_document
+from .providers import ProviderUnavailable
 
 @api_view(['GET'])
 def health_check(request):
@@ -26,6 +30,19 @@ def health_check(request):
 
 # Create your views here.
 
+class ProviderBusy(APIException):
+    """
+    The model provider is still rate limiting or failing after all retries
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The model provider is busy, please try again shortly.'
+    default_code = 'provider_busy'
+
+    def __init__(self, wait: float, detail=None, code=None):
+        super().__init__(detail, code)
+        # DRF's exception handler turns `wait` into a Retry-After header
+        self.wait = max(1, math.ceil(wait))
+
 class DocumentViewSet(viewsets.ModelViewSet):
     """
     ViewSet for managing document operations
@@ -45,9 +62,9 @@ class DocumentViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         """
-        Process uploaded document and create chunks with embeddings
+        Process uploaded document and create chunks with embeddings.
+        The document is only kept if every chunk was stored.
         """
-        document = serializer.save()
         file_obj = self.request.FILES.get('file')
         if not file_obj:
             raise ValueError("No file provided")
@@ -56,9 +73,25 @@ class DocumentViewSet(viewsets.ModelViewSet):
             raise ValueError("Unsupported file type. Only PDF and TXT files are supported.")
         
         content = file_obj.read()
-        process_document(document.id, content, file_obj.name)
+        document = serializer.save()
+        # Embedding happens outside any transaction, so undo the document explicitly on failure
+        try:
+            process_document(document.id, content, file_obj.name)
+        except ProviderUnavailable as e:
+            delete_document(document)
+            raise ProviderBusy(e.retry_after)
+        except Exception:
+            delete_document(document)
+            raise
         return document
 
+    def perform_destroy(self, instance):
+        """
+        Delete the document and any chunks no other document shares
+        """
+        delete_document(instance)
+
+@extend_schema(request=ChatRequestSerializer, responses=ChatResponseSerializer)
 @api_view(['POST'])
 def chat(request):
     """
@@ -93,18 +126,21 @@ def chat(request):
             document=document
         )
         
-        # Prepare and validate response
-        response_data = {
+        # Build the response directly; its shape is documented by ChatResponseSerializer
+        return Response({
             "answer": answer,
             "relevant_chunks": [
                 {"text": chunk.content, "relevance": chunk.relevance}
                 for chunk in relevant_chunks
             ]
-        }
-        response_serializer = ChatResponseSerializer(data=response_data)
-        response_serializer.is_valid(raise_exception=True)
-        
-        return Response(response_serializer.data)
+        })
+    except ProviderUnavailable as e:
+        busy = ProviderBusy(e.retry_after)
+        return Response(
+            {"detail": busy.detail},
+            status=busy.status_code,
+            headers={"Retry-After": str(busy.wait)}
+        )
     except Exception as e:
         return Response(
             {"detail": str(e)}, 
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -152,6 +153,10 @@ CORS_ALLOW_CREDENTIALS = True
 
 # REST framework settings
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
         'rest_framework.parsers.MultiPartParser',
@@ -160,6 +165,28 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Model provider settings
+OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL') or None
+OPENAI_REQUESTS_PER_MINUTE = int(os.environ.get('OPENAI_REQUESTS_PER_MINUTE', '3000'))
+OPENAI_MAX_CONCURRENCY = int(os.environ.get('OPENAI_MAX_CONCURRENCY', '8'))
+OPENAI_MAX_RETRIES = int(os.environ.get('OPENAI_MAX_RETRIES', '5'))
+
+# Vector search settings
+# 'none' scans full-precision vectors; 'halfvec' or 'binary' shortlist candidates
+# from a quantized index and re-rank them exactly
+VECTOR_QUANTIZATION = os.environ.get('VECTOR_QUANTIZATION', 'none')
+if VECTOR_QUANTIZATION not in ('none', 'halfvec', 'binary'):
+    raise ImproperlyConfigured(f"VECTOR_QUANTIZATION must be 'none', 'halfvec' or 'binary', not {VECTOR_QUANTIZATION!r}")
+VECTOR_RERANK_FACTOR = int(os.environ.get('VECTOR_RERANK_FACTOR', '10'))
+# Documents with at most this many chunks are always searched exactly
+VECTOR_EXACT_SCAN_MAX_CHUNKS = int(os.environ.get('VECTOR_EXACT_SCAN_MAX_CHUNKS', '2000'))
+# Upper bound on ivfflat lists visited by an iterative quantized scan
+VECTOR_IVFFLAT_MAX_PROBES = int(os.environ.get('VECTOR_IVFFLAT_MAX_PROBES', '100'))
+
+# Retrieved chunks whose simhash differs by at most this many bits from a
+# better-ranked chunk of the same document are dropped from the top-k
+CHUNK_DEDUP_MAX_DISTANCE = int(os.environ.get('CHUNK_DEDUP_MAX_DISTANCE', '3'))
+
 # Spectacular settings
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Document Q&A API',
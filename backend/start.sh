@@ -24,5 +24,8 @@ echo "Creating vector extension..."
 PGPASSWORD=postgres psql -h db -U postgres -d ragqa -c 'CREATE EXTENSION IF NOT EXISTS vector;'
 
 # Start the application
+# Threaded workers let concurrent requests share a process, so the provider
+# client's coalescing and concurrency cap apply across them
 echo "Starting application..."
-exec gunicorn ragqa.wsgi:application --bind 0.0.0.0:8000 --reload
+exec gunicorn ragqa.wsgi:application --bind 0.0.0.0:8000 --reload \
+  --worker-class gthread --workers "${GUNICORN_WORKERS:-2}" --threads "${GUNICORN_THREADS:-8}"